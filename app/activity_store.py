@@ -2,45 +2,164 @@
 Persistent storage for detected items/activity feed.
 """
 
-import json
 import os
+import sqlite3
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
 import threading
 
-ACTIVITY_FILE = Path("/data/activity.json")
+import orjson
+
+ACTIVITY_DB = Path("/data/activity.db")
+LEGACY_ACTIVITY_FILE = Path("/data/activity.json")
 MAX_ITEMS = int(os.getenv("MAX_ACTIVITY_ITEMS", "100"))
 
 _lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+# Bumped on every write so readers can tell whether the history changed
+_version = 0
+
+# Items are stored as JSON blobs (minus their steps); steps live in their own
+# table so appending one is a single-row INSERT instead of a full rewrite.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS activity (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    message_id TEXT NOT NULL DEFAULT '',
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_activity_message_id ON activity(message_id);
+CREATE TABLE IF NOT EXISTS activity_steps (
+    id INTEGER PRIMARY KEY,
+    activity_id INTEGER NOT NULL,
+    step TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_activity_steps_activity_id ON activity_steps(activity_id);
+"""
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Open the activity database on first use. Caller must hold _lock."""
+    global _conn
+    if _conn is None:
+        ACTIVITY_DB.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(ACTIVITY_DB), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _migrate_legacy_file(conn)
+        _conn = conn
+    return _conn
+
+
+def _migrate_legacy_file(conn: sqlite3.Connection) -> None:
+    """Import items from the old activity.json into an empty database."""
+    if not LEGACY_ACTIVITY_FILE.exists():
+        return
+    if conn.execute("SELECT 1 FROM activity LIMIT 1").fetchone():
+        return
+    try:
+        data = orjson.loads(LEGACY_ACTIVITY_FILE.read_bytes())
+    except Exception:
+        return
+    if not isinstance(data, list):
+        return
+    with conn:
+        for item in data[-MAX_ITEMS:]:
+            activity_id = _insert_item(conn, item)
+            for step in item.get("steps") or []:
+                _insert_step(conn, activity_id, step)
+
+
+def _dumps(obj: Any) -> str:
+    """Encode for a TEXT column (orjson returns bytes)."""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _insert_item(conn: sqlite3.Connection, item: Dict[str, Any]) -> int:
+    stored = {k: v for k, v in item.items() if k != "steps"}
+    cursor = conn.execute(
+        "INSERT INTO activity (ts, message_id, item) VALUES (?, ?, ?)",
+        (item.get("ts", ""), item.get("message_id") or "", _dumps(stored))
+    )
+    return cursor.lastrowid
+
+
+def _insert_step(conn: sqlite3.Connection, activity_id: int, step: Dict[str, Any]) -> None:
+    conn.execute(
+        "INSERT INTO activity_steps (activity_id, step) VALUES (?, ?)",
+        (activity_id, _dumps(step))
+    )
+
+
+def _find_item(conn: sqlite3.Connection, message_id: str) -> Optional[tuple]:
+    """Return (id, item JSON) of the oldest stored item with this message_id."""
+    return conn.execute(
+        "SELECT id, item FROM activity WHERE message_id = ? ORDER BY id LIMIT 1",
+        (message_id,)
+    ).fetchone()
+
+
+def _bump_version() -> None:
+    global _version
+    _version += 1
+
+
+def get_activity_version() -> int:
+    """Return a counter that changes whenever the activity history is modified."""
+    return _version
 
 
 def load_activity() -> List[Dict[str, Any]]:
-    """Load activity history from file."""
-    if ACTIVITY_FILE.exists():
+    """Load activity history (oldest first)."""
+    with _lock:
         try:
-            with open(ACTIVITY_FILE, "r") as f:
-                data = json.load(f)
-                return data if isinstance(data, list) else []
-        except Exception:
-            pass
-    return []
+            conn = _get_conn()
+            rows = conn.execute(
+                "SELECT id, item FROM activity ORDER BY id DESC LIMIT ?", (MAX_ITEMS,)
+            ).fetchall()
+            if not rows:
+                return []
+            rows.reverse()
 
+            items = []
+            by_id = {}
+            for activity_id, item_json in rows:
+                item = orjson.loads(item_json)
+                item["steps"] = []
+                by_id[activity_id] = item
+                items.append(item)
 
-def save_activity(items: List[Dict[str, Any]]) -> None:
-    """Save activity history to file."""
-    ACTIVITY_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(ACTIVITY_FILE, "w") as f:
-        json.dump(items[-MAX_ITEMS:], f, indent=2)
+            step_rows = conn.execute(
+                "SELECT activity_id, step FROM activity_steps WHERE activity_id >= ? ORDER BY id",
+                (rows[0][0],)
+            )
+            for activity_id, step_json in step_rows:
+                item = by_id.get(activity_id)
+                if item is not None:
+                    item["steps"].append(orjson.loads(step_json))
+            return items
+        except Exception:
+            return []
 
 
 def add_activity_item(item: Dict[str, Any]) -> None:
     """Add a new item to the activity history."""
     with _lock:
-        items = load_activity()
-        items.append(item)
-        # Keep only last MAX_ITEMS
-        save_activity(items[-MAX_ITEMS:])
+        conn = _get_conn()
+        with conn:
+            activity_id = _insert_item(conn, item)
+            for step in item.get("steps") or []:
+                _insert_step(conn, activity_id, step)
+            # Keep only last MAX_ITEMS
+            cutoff = conn.execute(
+                "SELECT id FROM activity ORDER BY id DESC LIMIT 1 OFFSET ?", (MAX_ITEMS - 1,)
+            ).fetchone()
+            if cutoff:
+                conn.execute("DELETE FROM activity WHERE id < ?", cutoff)
+                conn.execute("DELETE FROM activity_steps WHERE activity_id < ?", cutoff)
+        _bump_version()
 
 
 def create_activity_item(
@@ -79,31 +198,34 @@ def create_activity_item(
 def update_activity_result(message_id: str, result_status: str, result_message: str, result_details: Dict[str, Any] = None) -> bool:
     """Update result fields of existing activity item by message_id."""
     with _lock:
-        items = load_activity()
-        for item in items:
-            if item.get("message_id") == message_id:
-                item["result_status"] = result_status
-                item["result_message"] = result_message
-                item["result_details"] = result_details or {}
-                save_activity(items)
-                return True
-        return False
+        conn = _get_conn()
+        row = _find_item(conn, message_id)
+        if row is None:
+            return False
+        activity_id, item_json = row
+        item = orjson.loads(item_json)
+        item["result_status"] = result_status
+        item["result_message"] = result_message
+        item["result_details"] = result_details or {}
+        with conn:
+            conn.execute("UPDATE activity SET item = ? WHERE id = ?", (_dumps(item), activity_id))
+        _bump_version()
+        return True
 
 
 def append_activity_step(message_id: str, step: str, message: str, details: Dict[str, Any] = None) -> bool:
     """Append a step log to an existing activity item."""
     with _lock:
-        items = load_activity()
-        for item in items:
-            if item.get("message_id") == message_id:
-                if "steps" not in item:
-                    item["steps"] = []
-                item["steps"].append({
-                    "ts": datetime.now(timezone.utc).isoformat(),
-                    "step": step,
-                    "message": message,
-                    "details": details or {}
-                })
-                save_activity(items)
-                return True
-        return False
+        conn = _get_conn()
+        row = _find_item(conn, message_id)
+        if row is None:
+            return False
+        with conn:
+            _insert_step(conn, row[0], {
+                "ts": datetime.now(timezone.utc).isoformat(),
+                "step": step,
+                "message": message,
+                "details": details or {}
+            })
+        _bump_version()
+        return True
@@ -266,27 +266,25 @@ class DiscordWatcher:
             - matched_rule: The rule that matched (or None)
             - should_trigger: Whether to trigger action
         """
-        from app.rules_ui import get_whitelist_rules, get_blacklist_rules
+        from app.rules_ui import match_rule
 
         channel_type = self.channel_config.get(channel_url, "blacklist")
 
         if channel_type == "whitelist":
             # Whitelist channel: Auto-click everything EXCEPT items matching whitelist rules
-            whitelist_rules = get_whitelist_rules()
-            for rule in whitelist_rules:
-                if parsed.matches_rule(rule.keywords, rule.max_price):
-                    # Match found = DON'T trigger (exclusion rule)
-                    return (rule, False)
+            rule = match_rule("whitelist", parsed.product_name, parsed.price)
+            if rule:
+                # Match found = DON'T trigger (exclusion rule)
+                return (rule, False)
             # No match = DO trigger (auto-click everything else)
             return (None, True)
 
         else:  # blacklist (default)
             # Blacklist channel: Auto-click ONLY items matching blacklist rules
-            blacklist_rules = get_blacklist_rules()
-            for rule in blacklist_rules:
-                if parsed.matches_rule(rule.keywords, rule.max_price):
-                    # Match found = DO trigger (inclusion rule)
-                    return (rule, True)
+            rule = match_rule("blacklist", parsed.product_name, parsed.price)
+            if rule:
+                # Match found = DO trigger (inclusion rule)
+                return (rule, True)
             # No match = DON'T trigger
             return (None, False)
 
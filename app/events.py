@@ -5,8 +5,8 @@ SSE Event Broker for broadcasting events to connected clients.
 import asyncio
 import json
 from datetime import datetime, timezone
-from typing import AsyncGenerator, Dict, Any, List
-from dataclasses import dataclass, field, asdict
+from typing import AsyncGenerator, Dict, Any, List, Optional
+from dataclasses import dataclass, field
 from enum import Enum
 
 
@@ -42,11 +42,19 @@ class Event:
     step: str
     url: str = ""
     details: Dict[str, Any] = field(default_factory=dict)
+    _json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
 
     def to_json(self) -> str:
-        data = asdict(self)
-        data["type"] = self.type.value
-        return json.dumps(data)
+        # Encoded once, then shared by the log line and every SSE subscriber
+        if self._json is None:
+            self._json = json.dumps({
+                "ts": self.ts,
+                "type": self.type.value,
+                "step": self.step,
+                "url": self.url,
+                "details": self.details
+            })
+        return self._json
 
     def to_log_line(self) -> str:
         return self.to_json()
@@ -158,6 +166,36 @@ class EventBroker:
                 if queue in self._subscribers:
                     self._subscribers.remove(queue)
 
+    async def subscribe_batches(
+        self, window: float = 0.02, max_batch: int = 16
+    ) -> AsyncGenerator[List[Event], None]:
+        """Subscribe to events, yielding them in batches.
+
+        After the first event arrives, waits `window` seconds and takes
+        everything else queued by then, so a burst goes out as one frame.
+        Batches hold at most `max_batch` events; when that many are already
+        queued the batch is sent without waiting.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+
+        async with self._lock:
+            self._subscribers.append(queue)
+
+        try:
+            while True:
+                batch = [await queue.get()]
+                while len(batch) < max_batch and not queue.empty():
+                    batch.append(queue.get_nowait())
+                if len(batch) < max_batch:
+                    await asyncio.sleep(window)
+                    while len(batch) < max_batch and not queue.empty():
+                        batch.append(queue.get_nowait())
+                yield batch
+        finally:
+            async with self._lock:
+                if queue in self._subscribers:
+                    self._subscribers.remove(queue)
+
     async def get_history(self, limit: int = 50) -> List[Event]:
         """Get recent event history."""
         async with self._lock:
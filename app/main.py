@@ -310,8 +310,12 @@ async def get_status():
 
 
 @app.get("/events")
-async def events_stream():
-    """SSE stream of structured JSON events."""
+async def events_stream(batch: bool = False):
+    """SSE stream of structured JSON events.
+
+    With ?batch=true, events arriving within 20ms of each other are sent
+    together as one "batch" frame whose data is a JSON array of events.
+    """
     async def event_generator():
         async for event in event_broker.subscribe():
             yield {
@@ -319,7 +323,15 @@ async def events_stream():
                 "data": event.to_json()
             }
 
-    return EventSourceResponse(event_generator())
+    async def batch_generator():
+        async for events in event_broker.subscribe_batches():
+            yield {
+                "event": "batch",
+                # Events are already encoded, so join them rather than re-encode
+                "data": "[" + ",".join(e.to_json() for e in events) + "]"
+            }
+
+    return EventSourceResponse(batch_generator() if batch else event_generator())
 
 
 @app.post("/actions/trigger")
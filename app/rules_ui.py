@@ -3,80 +3,308 @@ Simple Web UI for managing purchase rules.
 Runs on port 8001.
 """
 
-import json
+import asyncio
+import gzip
+import hashlib
 import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List
-from dataclasses import dataclass, asdict
-
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, Response, JSONResponse
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+from dataclasses import dataclass, field
+
+import brotli
+import httpx
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, Response, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
-from app.activity_store import load_activity
+from app.activity_store import load_activity, get_activity_version
 
 
 RULES_FILE = Path("/data/rules.json")
+# Rule edits landing within this window are coalesced into one file write
+RULES_FLUSH_DELAY_SECONDS = 0.1
 MAX_FEED_ITEMS = int(os.getenv("MAX_FEED_ITEMS", "50"))
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Rule:
-    """A purchase rule with keywords and max price."""
-    keywords: List[str]
+    """A purchase rule with keywords and max price.
+
+    Immutable so cached instances can be shared across requests.
+    """
+    keywords: Tuple[str, ...]
     max_price: float
     rule_type: str = "blacklist"  # "whitelist" or "blacklist"
+    id: int = 0  # Stable id assigned on creation, used for deletes
+    keywords_lower: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Normalise once here instead of lowercasing on every match
+        object.__setattr__(self, "keywords", tuple(self.keywords))
+        object.__setattr__(self, "keywords_lower", tuple(k.lower().strip() for k in self.keywords))
 
     def to_dict(self):
-        return asdict(self)
+        # Built directly rather than via asdict(), which deep-copies recursively
+        return {
+            "keywords": self.keywords,
+            "max_price": self.max_price,
+            "rule_type": self.rule_type,
+            "id": self.id,
+        }
+
+
+class RuleMatcher:
+    """Matches products against an ordered list of rules.
+
+    Rule fields are laid out as parallel tuples (struct-of-arrays) so the
+    scan reads plain sequences instead of chasing attributes per rule.
+    """
+    __slots__ = ("rules", "max_prices", "kw_index")
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = tuple(rules)
+        self.max_prices = tuple(r.max_price for r in rules)
+        # Inverted index: each distinct keyword -> indices of rules using it
+        self.kw_index: Dict[str, List[int]] = {}
+        for i, rule in enumerate(rules):
+            for keyword in rule.keywords_lower:
+                postings = self.kw_index.setdefault(keyword, [])
+                if not postings or postings[-1] != i:
+                    postings.append(i)
+
+    def candidate_rule_indices(self, product_lower: str) -> set:
+        """Indices of rules with at least one keyword found in the product.
+
+        Each distinct keyword is tested once, however many rules share it.
+        """
+        candidates = set()
+        for keyword, postings in self.kw_index.items():
+            if keyword in product_lower:
+                candidates.update(postings)
+        return candidates
+
+    def match(self, product_lower: str, price: float) -> Optional[Rule]:
+        """Return the first rule matching the (lowercased) product and price."""
+        max_prices = self.max_prices
+        for i in sorted(self.candidate_rule_indices(product_lower)):
+            if price <= max_prices[i]:
+                return self.rules[i]
+        return None
 
 
 class RuleCreate(BaseModel):
     """Request model for creating a rule."""
-    keywords: str  # Comma-separated
-    max_price: float
-    rule_type: str = "blacklist"
+    keywords: List[str] = Field(min_length=1)  # Sent as a comma-separated string
+    max_price: float = Field(gt=0)
+    rule_type: Literal["whitelist", "blacklist"] = "blacklist"
+
+    @field_validator("keywords", mode="before")
+    @classmethod
+    def split_keywords(cls, value):
+        """Split a comma-separated string into stripped, non-empty keywords.
+
+        Lists get the same cleanup, so a blank keyword (which would match
+        every product) can never get through.
+        """
+        if isinstance(value, str):
+            value = value.split(",")
+        elif not isinstance(value, list):
+            return value  # Left for the List[str] check to reject
+        if not all(isinstance(k, str) for k in value):
+            raise ValueError("keywords must be strings")
+        return [k.strip() for k in value if k.strip()]
+
+
+# Rules keyed by id plus the derived list and whitelist/blacklist partitions,
+# keyed on the rules file (mtime, size) so unchanged files are never re-read.
+# The cache is authoritative while edits are waiting to be flushed (_dirty).
+_rules_cache = {
+    "key": None,
+    "generation": 0,
+    "etag": 'W/"0"',
+    "next_id": 1,
+    "by_id": {},
+    "rules": [],
+    "partitions": ([], []),  # (whitelist, blacklist)
+    "matchers": {"whitelist": RuleMatcher([]), "blacklist": RuleMatcher([])},
+    # JSON-ready dicts for the API, built once per reload/edit
+    "dicts": [],
+    "partition_dicts": ([], []),
+}
+
+# Distinguishes ETags across restarts for data versioned by in-process counters
+_BOOT_TAG = f"{time.time_ns():x}"
+
+_rules_lock = threading.Lock()
+_rules_dir_ready = False
+_dirty = False
+_flush_task: Optional[asyncio.Task] = None
+
+
+def _read_rules_file() -> Tuple[Dict[int, Rule], int]:
+    """Parse rules from file, returning (rules by id, next free id)."""
+    try:
+        data = orjson.loads(RULES_FILE.read_bytes())
+        # Migration: the old format was a bare list; number its rules in order
+        if isinstance(data, list):
+            data = {"next_id": len(data) + 1, "rules": {str(i): r for i, r in enumerate(data, 1)}}
+        rules = {}
+        for key, r in data["rules"].items():
+            # Migration: convert old 'enabled' field to new 'rule_type' field
+            if "enabled" in r and "rule_type" not in r:
+                r["rule_type"] = "blacklist"
+            r.pop("enabled", None)  # Remove old field
+            # Interned so rule_type comparisons are usually a pointer check
+            r["rule_type"] = sys.intern(r.get("rule_type", "blacklist"))
+            r["id"] = int(key)
+            rules[r["id"]] = Rule(**r)
+        return rules, max(data.get("next_id", 1), max(rules, default=0) + 1)
+    except FileNotFoundError:
+        # Normal before the first rule is saved
+        return {}, 1
+    except (OSError, ValueError, KeyError, TypeError):
+        # Unreadable or malformed file: start empty rather than fail the app
+        return {}, 1
+
+
+def _index_rules(by_id: Dict[int, Rule], next_id: int) -> None:
+    """Store rules in the cache and rebuild the derived lists."""
+    rules = list(by_id.values())
+    _rules_cache["generation"] += 1
+    _rules_cache["etag"] = f'W/"{_BOOT_TAG}-{_rules_cache["generation"]}"'
+    _rules_cache["next_id"] = next_id
+    _rules_cache["by_id"] = by_id
+    _rules_cache["rules"] = rules
+
+    whitelist, blacklist = [], []
+    dicts, whitelist_dicts, blacklist_dicts = [], [], []
+    for r in rules:
+        d = r.to_dict()
+        dicts.append(d)
+        if r.rule_type == "whitelist":
+            whitelist.append(r)
+            whitelist_dicts.append(d)
+        elif r.rule_type == "blacklist":
+            blacklist.append(r)
+            blacklist_dicts.append(d)
+    _rules_cache["partitions"] = (whitelist, blacklist)
+    _rules_cache["matchers"] = {"whitelist": RuleMatcher(whitelist), "blacklist": RuleMatcher(blacklist)}
+    _rules_cache["dicts"] = dicts
+    _rules_cache["partition_dicts"] = (whitelist_dicts, blacklist_dicts)
+
+
+def _rules_file_key() -> Optional[Tuple[int, int]]:
+    """Return (mtime_ns, size) of the rules file, or None if it is missing."""
+    try:
+        st = RULES_FILE.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _refresh_rules_cache() -> dict:
+    """Reload the rules cache if the rules file changed since the last read."""
+    key = _rules_file_key()
+    if _dirty or key == _rules_cache["key"]:
+        return _rules_cache
+
+    with _rules_lock:
+        # Another thread may have reloaded while we waited for the lock
+        if key != _rules_cache["key"]:
+            by_id, next_id = _read_rules_file()
+            _rules_cache["key"] = key
+            _index_rules(by_id, next_id)
+    return _rules_cache
 
 
 def load_rules() -> List[Rule]:
-    """Load rules from file."""
-    if RULES_FILE.exists():
-        try:
-            with open(RULES_FILE, "r") as f:
-                data = json.load(f)
-                rules = []
-                for r in data:
-                    # Migration: convert old 'enabled' field to new 'rule_type' field
-                    if "enabled" in r and "rule_type" not in r:
-                        r["rule_type"] = "blacklist"
-                    r.pop("enabled", None)  # Remove old field
-                    rules.append(Rule(**r))
-                return rules
-        except Exception:
-            pass
-    return []
-
-
-def save_rules(rules: List[Rule]) -> None:
-    """Save rules to file."""
-    RULES_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(RULES_FILE, "w") as f:
-        json.dump([r.to_dict() for r in rules], f, indent=2)
+    """Load rules (cached). The returned list is shared - do not mutate it."""
+    return _refresh_rules_cache()["rules"]
+
+
+def save_rules(rules: Dict[int, Rule], next_id: int) -> None:
+    """Save rules to file (atomically, via a temp file and rename)."""
+    global _rules_dir_ready
+    if not _rules_dir_ready:
+        RULES_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _rules_dir_ready = True
+
+    tmp_file = RULES_FILE.with_suffix(".json.tmp")
+    tmp_file.write_bytes(orjson.dumps({
+        "next_id": next_id,
+        "rules": {str(rule_id): r.to_dict() for rule_id, r in rules.items()}
+    }, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, RULES_FILE)
+
+
+def flush_rules() -> None:
+    """Write pending in-memory rule changes to disk."""
+    global _dirty
+    if _dirty:
+        save_rules(_rules_cache["by_id"], _rules_cache["next_id"])
+        # The file now matches the cache; re-key so our own write isn't re-parsed
+        _rules_cache["key"] = _rules_file_key()
+        _dirty = False
+
+
+async def _flush_rules_soon() -> None:
+    await asyncio.sleep(RULES_FLUSH_DELAY_SECONDS)
+    flush_rules()
+
+
+def _mark_rules_dirty() -> None:
+    """Schedule a debounced write of the in-memory rules."""
+    global _dirty, _flush_task
+    _dirty = True
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(_flush_rules_soon())
+
+
+def partition_rules() -> Tuple[List[Rule], List[Rule]]:
+    """Get (whitelist, blacklist) rules, split once per reload (cached, shared)."""
+    return _refresh_rules_cache()["partitions"]
+
+
+def match_rule(rule_type: str, product_name: str, price: float) -> Optional[Rule]:
+    """Return the first rule of rule_type matching the product and price, if any."""
+    return _refresh_rules_cache()["matchers"][rule_type].match(product_name.lower(), price)
 
 
 def get_whitelist_rules() -> List[Rule]:
     """Get only whitelist rules."""
-    return [r for r in load_rules() if r.rule_type == "whitelist"]
+    return partition_rules()[0]
 
 
 def get_blacklist_rules() -> List[Rule]:
     """Get only blacklist rules."""
-    return [r for r in load_rules() if r.rule_type == "blacklist"]
+    return partition_rules()[1]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Rules UI lifespan: flush pending rule edits and close the proxy client on shutdown."""
+    yield
+    flush_rules()
+    await _main_app_client.aclose()
 
 
 # Create FastAPI app for rules UI
-rules_app = FastAPI(title="Purchase Rules Manager")
+rules_app = FastAPI(
+    title="Purchase Rules Manager",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+# Compress JSON API responses (rules, activity); the HTML page below is
+# precompressed and passes through untouched since it sets Content-Encoding.
+rules_app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=4)
 
 # Mount static files directory (create if it doesn't exist)
 static_dir = Path(__file__).parent / "static"
@@ -95,492 +323,7 @@ HTML_TEMPLATE = """
     <link rel="icon" type="image/png" href="/static/favicon.png">
     <link rel="apple-touch-icon" href="/static/icon-192.png">
     <link rel="manifest" href="/manifest.json">
-    <style>
-        * {
-            box-sizing: border-box;
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-        }
-        body {
-            margin: 0;
-            padding: 20px;
-            background: #1a1a2e;
-            color: #eee;
-            min-height: 100vh;
-        }
-        .container {
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 20px;
-            max-width: 1400px;
-            margin: 0 auto;
-        }
-        @media (max-width: 900px) {
-            .container {
-                grid-template-columns: 1fr;
-            }
-        }
-        .panel {
-            background: #16213e;
-            border-radius: 8px;
-            padding: 20px;
-            display: flex;
-            flex-direction: column;
-            max-height: calc(100vh - 40px);
-        }
-        .panel-content {
-            flex: 1;
-            overflow-y: auto;
-            min-height: 0;
-        }
-        h2 {
-            color: #00d4ff;
-            margin-top: 0;
-            border-bottom: 2px solid #00d4ff;
-            padding-bottom: 10px;
-            font-size: 1.3em;
-        }
-        .rule-card {
-            background: #0f0f23;
-            border-radius: 8px;
-            padding: 8px 12px;
-            margin-bottom: 8px;
-            border-left: 4px solid #00d4ff;
-        }
-        .rule-content {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            gap: 10px;
-        }
-        .rule-info {
-            flex: 1;
-            min-width: 0;
-            display: flex;
-            align-items: center;
-            gap: 15px;
-        }
-        .rule-actions {
-            display: flex;
-            gap: 8px;
-            align-items: center;
-            flex-shrink: 0;
-        }
-        label {
-            display: block;
-            margin-bottom: 5px;
-            color: #aaa;
-            font-size: 0.9em;
-        }
-        input[type="text"], input[type="number"] {
-            width: 100%;
-            padding: 10px;
-            border: 1px solid #333;
-            border-radius: 4px;
-            background: #0f0f23;
-            color: #eee;
-            margin-bottom: 10px;
-        }
-        input[type="text"]:focus, input[type="number"]:focus {
-            outline: none;
-            border-color: #00d4ff;
-        }
-        .input-row {
-            display: grid;
-            grid-template-columns: 2fr 1fr;
-            gap: 15px;
-        }
-        button {
-            padding: 10px 20px;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 0.9em;
-            transition: background 0.2s;
-        }
-        .btn-primary {
-            background: #00d4ff;
-            color: #000;
-        }
-        .btn-primary:hover {
-            background: #00a8cc;
-        }
-        .btn-danger {
-            background: #ff4757;
-            color: #fff;
-        }
-        .btn-danger:hover {
-            background: #cc3a47;
-        }
-        .btn-small {
-            padding: 5px 10px;
-            font-size: 0.8em;
-        }
-        .add-form {
-            background: #0f0f23;
-            border-radius: 8px;
-            padding: 15px;
-            margin-bottom: 15px;
-            border: 2px dashed #333;
-            flex-shrink: 0;
-        }
-        .add-form h3 {
-            margin-top: 0;
-            color: #00d4ff;
-            font-size: 1em;
-        }
-        .empty-state {
-            text-align: center;
-            padding: 30px;
-            color: #666;
-        }
-        .status {
-            padding: 10px;
-            border-radius: 4px;
-            margin-bottom: 15px;
-            display: none;
-        }
-        .status.success {
-            background: #00d4ff22;
-            border: 1px solid #00d4ff;
-            color: #00d4ff;
-            display: block;
-        }
-        .status.error {
-            background: #ff475722;
-            border: 1px solid #ff4757;
-            color: #ff4757;
-            display: block;
-        }
-        .keywords-display {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 5px;
-            margin-bottom: 0;
-            flex: 1;
-        }
-        .keyword-tag {
-            background: #00d4ff33;
-            color: #00d4ff;
-            padding: 2px 6px;
-            border-radius: 3px;
-            font-size: 0.8em;
-        }
-        .price-display {
-            font-size: 0.95em;
-            color: #4cd137;
-            min-width: 80px;
-            text-align: right;
-        }
-        /* Modal Styles */
-        .modal-overlay {
-            display: none;
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(0, 0, 0, 0.7);
-            z-index: 1000;
-            align-items: center;
-            justify-content: center;
-        }
-        .modal-overlay.active {
-            display: flex;
-        }
-        .modal-content {
-            background: #16213e;
-            border-radius: 8px;
-            padding: 25px;
-            max-width: 500px;
-            width: 90%;
-            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.5);
-        }
-        .modal-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 20px;
-            border-bottom: 2px solid #00d4ff;
-            padding-bottom: 10px;
-        }
-        .modal-header h3 {
-            margin: 0;
-            color: #00d4ff;
-        }
-        .btn-close {
-            background: transparent;
-            border: none;
-            color: #aaa;
-            font-size: 1.5em;
-            cursor: pointer;
-            padding: 0;
-            width: 30px;
-            height: 30px;
-        }
-        .btn-close:hover {
-            color: #fff;
-        }
-        /* Section Headers */
-        .rules-section {
-            margin-bottom: 20px;
-        }
-        .section-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 10px;
-        }
-        .section-title {
-            color: #00d4ff;
-            font-size: 1em;
-            font-weight: 600;
-            margin: 0;
-        }
-        .btn-add {
-            background: transparent;
-            border: 1px solid #00d4ff;
-            color: #00d4ff;
-            width: 28px;
-            height: 28px;
-            padding: 0;
-            border-radius: 4px;
-            font-size: 1.2em;
-            line-height: 1;
-        }
-        .btn-add:hover {
-            background: #00d4ff;
-            color: #000;
-        }
-        /* X Delete Button */
-        .btn-delete-x {
-            background: transparent;
-            border: 1px solid #ff4757;
-            color: #ff4757;
-            width: 28px;
-            height: 28px;
-            padding: 0;
-            border-radius: 4px;
-            font-size: 1.1em;
-            line-height: 1;
-        }
-        .btn-delete-x:hover {
-            background: #ff4757;
-            color: #fff;
-        }
-        /* Activity Feed Styles */
-        .activity-feed {
-            flex: 1;
-            overflow-y: auto;
-            min-height: 0;
-        }
-        .feed-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 15px;
-        }
-        .connection-status {
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            font-size: 0.85em;
-        }
-        .status-dot {
-            width: 10px;
-            height: 10px;
-            border-radius: 50%;
-            background: #666;
-        }
-        .status-dot.connected {
-            background: #4cd137;
-            box-shadow: 0 0 8px #4cd137;
-        }
-        .status-dot.disconnected {
-            background: #ff4757;
-        }
-        .feed-item {
-            background: #0f0f23;
-            border-radius: 8px;
-            padding: 12px;
-            margin-bottom: 10px;
-            border-left: 4px solid #666;
-            animation: slideIn 0.3s ease;
-        }
-        @keyframes slideIn {
-            from {
-                opacity: 0;
-                transform: translateX(20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateX(0);
-            }
-        }
-        .feed-item.triggered {
-            border-left-color: #4cd137;
-            background: #4cd13711;
-        }
-        .feed-item.not-triggered {
-            border-left-color: #ffa502;
-        }
-        .feed-item.error {
-            border-left-color: #ff4757;
-        }
-        .feed-item-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: flex-start;
-            margin-bottom: 8px;
-        }
-        .feed-item-meta {
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }
-        .feed-item-time {
-            font-size: 0.75em;
-            color: #666;
-            white-space: nowrap;
-        }
-        .feed-channel {
-            font-size: 0.7em;
-            color: #7289da;
-            background: #7289da22;
-            padding: 2px 6px;
-            border-radius: 3px;
-            white-space: nowrap;
-        }
-        .feed-item-product {
-            font-weight: 500;
-            color: #eee;
-            font-size: 0.95em;
-            line-height: 1.3;
-            margin-bottom: 8px;
-            word-break: break-word;
-        }
-        .feed-item-product a:hover {
-            color: #00d4ff !important;
-            text-decoration: underline !important;
-        }
-        .feed-item-details {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 10px;
-            font-size: 0.85em;
-        }
-        .feed-price {
-            color: #4cd137;
-            font-weight: 600;
-        }
-        .feed-discount {
-            color: #ffa502;
-        }
-        .feed-verdict {
-            padding: 2px 8px;
-            border-radius: 3px;
-            font-size: 0.8em;
-            font-weight: 500;
-        }
-        .feed-verdict.trigger {
-            background: #4cd13733;
-            color: #4cd137;
-        }
-        .feed-verdict.no-trigger {
-            background: #ffa50233;
-            color: #ffa502;
-        }
-        .clear-feed {
-            background: transparent;
-            border: 1px solid #444;
-            color: #888;
-            padding: 5px 10px;
-            font-size: 0.8em;
-        }
-        .clear-feed:hover {
-            border-color: #666;
-            color: #aaa;
-        }
-        /* Result Badges */
-        .result-badge {
-            display: inline-block;
-            padding: 2px 8px;
-            border-radius: 3px;
-            font-size: 0.75em;
-            font-weight: 600;
-            margin-left: 8px;
-        }
-        .result-badge.pending { background: #ffa50233; color: #ffa502; }
-        .result-badge.success { background: #4cd13733; color: #4cd137; }
-        .result-badge.failure { background: #ff475733; color: #ff4757; }
-        .failure-reason {
-            font-size: 0.8em;
-            color: #ff4757;
-            margin-top: 4px;
-            padding: 4px 8px;
-            background: #ff475711;
-            border-radius: 4px;
-            word-break: break-word;
-        }
-        /* Steps Section */
-        .steps-toggle {
-            background: transparent;
-            border: 1px solid #333;
-            color: #888;
-            padding: 4px 8px;
-            font-size: 0.75em;
-            cursor: pointer;
-            border-radius: 4px;
-            margin-top: 8px;
-        }
-        .steps-toggle:hover { border-color: #00d4ff; color: #00d4ff; }
-        .steps-container {
-            display: none;
-            margin-top: 10px;
-            padding: 10px;
-            background: #0a0a1a;
-            border-radius: 4px;
-            max-height: 200px;
-            overflow-y: auto;
-        }
-        .steps-container.expanded { display: block; }
-        .step-entry {
-            font-size: 0.8em;
-            padding: 4px 0;
-            border-bottom: 1px solid #1a1a2e;
-            display: flex;
-            gap: 10px;
-        }
-        .step-entry:last-child { border-bottom: none; }
-        .step-time { color: #666; min-width: 70px; }
-        .step-name { color: #00d4ff; min-width: 120px; }
-        .step-message { color: #aaa; flex: 1; }
-        /* Trigger Button */
-        .btn-trigger {
-            background: transparent;
-            border: 1px solid #00d4ff;
-            color: #00d4ff;
-            padding: 4px 12px;
-            font-size: 0.75em;
-            cursor: pointer;
-            border-radius: 4px;
-            margin-right: 8px;
-            transition: all 0.2s;
-        }
-        .btn-trigger:hover {
-            background: #00d4ff;
-            color: #000;
-        }
-        .btn-trigger:disabled {
-            opacity: 0.5;
-            cursor: not-allowed;
-            border-color: #666;
-            color: #666;
-        }
-        .btn-trigger:disabled:hover {
-            background: transparent;
-            color: #666;
-        }
-    </style>
+    <link rel="stylesheet" href="/static/app.css?v=__ASSET_VERSION__">
 </head>
 <body>
     <div class="container">
@@ -650,715 +393,230 @@ HTML_TEMPLATE = """
         </div>
     </div>
 
-    <script>
-        const API_BASE = '';
-        const EVENTS_URL = '/events';
-        let eventSource = null;
-        const MAX_FEED_ITEMS = __MAX_FEED_ITEMS__;
-
-        // Rules Management
-        let currentRuleType = 'blacklist';
-
-        function showStatus(message, isError = false) {
-            const status = document.getElementById('status');
-            status.textContent = message;
-            status.className = 'status ' + (isError ? 'error' : 'success');
-            setTimeout(() => { status.style.display = 'none'; }, 3000);
-        }
-
-        function openAddModal(ruleType) {
-            currentRuleType = ruleType;
-            document.getElementById('modal-rule-type').value = ruleType;
-            document.getElementById('modal-keywords').value = '';
-            document.getElementById('modal-max-price').value = '';
-            document.getElementById('add-rule-modal').classList.add('active');
-        }
-
-        function closeAddModal() {
-            document.getElementById('add-rule-modal').classList.remove('active');
-        }
-
-        async function loadRules() {
-            try {
-                const response = await fetch(API_BASE + '/api/rules');
-                const rules = await response.json();
-                const whitelistRules = rules.filter(r => r.rule_type === 'whitelist');
-                const blacklistRules = rules.filter(r => r.rule_type === 'blacklist');
-                renderRuleList('whitelist-rules-list', whitelistRules, rules);
-                renderRuleList('blacklist-rules-list', blacklistRules, rules);
-            } catch (error) {
-                showStatus('Failed to load rules: ' + error.message, true);
-            }
-        }
-
-        function renderRuleList(containerId, rules, allRules) {
-            const container = document.getElementById(containerId);
-            if (rules.length === 0) {
-                container.innerHTML = '<div class="empty-state" style="padding: 15px;">No rules configured.</div>';
-                return;
-            }
-
-            container.innerHTML = rules.map(rule => {
-                const globalIndex = allRules.indexOf(rule);
-                return `
-                    <div class="rule-card">
-                        <div class="rule-content">
-                            <div class="rule-info">
-                                <div class="keywords-display">
-                                    ${rule.keywords.map(k => `<span class="keyword-tag">${k}</span>`).join('')}
-                                </div>
-                                <div class="price-display">$${rule.max_price.toFixed(2)}</div>
-                            </div>
-                            <div class="rule-actions">
-                                <button class="btn-delete-x" onclick="deleteRuleQuick(${globalIndex})" title="Delete">&times;</button>
-                            </div>
-                        </div>
-                    </div>
-                `;
-            }).join('');
-        }
-
-        async function addRuleFromModal() {
-            const keywords = document.getElementById('modal-keywords').value.trim();
-            const maxPrice = parseFloat(document.getElementById('modal-max-price').value);
-            const ruleType = document.getElementById('modal-rule-type').value;
-
-            if (!keywords) { showStatus('Please enter keywords', true); return; }
-            if (isNaN(maxPrice) || maxPrice <= 0) { showStatus('Please enter valid price', true); return; }
-
-            try {
-                const response = await fetch(API_BASE + '/api/rules', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ keywords, max_price: maxPrice, rule_type: ruleType })
-                });
-                if (!response.ok) throw new Error('Failed');
-
-                closeAddModal();
-                showStatus('Rule added');
-                loadRules();
-            } catch (error) {
-                showStatus('Failed to add rule', true);
-            }
-        }
-
-        async function deleteRuleQuick(index) {
-            try {
-                await fetch(API_BASE + '/api/rules/' + index, { method: 'DELETE' });
-                showStatus('Rule deleted');
-                loadRules();
-            } catch (error) {
-                showStatus('Failed to delete', true);
-            }
-        }
-
-        // Close modal on background click
-        document.addEventListener('click', (e) => {
-            if (e.target.id === 'add-rule-modal') {
-                closeAddModal();
-            }
-        });
-
-        // Activity Feed
-        function setConnectionStatus(connected) {
-            const dot = document.getElementById('connection-dot');
-            const text = document.getElementById('connection-text');
-            if (connected) {
-                dot.className = 'status-dot connected';
-                text.textContent = 'Connected';
-            } else {
-                dot.className = 'status-dot disconnected';
-                text.textContent = 'Disconnected';
-            }
-        }
-
-        function formatTime(isoString) {
-            const date = new Date(isoString);
-            return date.toLocaleTimeString();
-        }
-
-        function addFeedItem(data) {
-            const feed = document.getElementById('activity-feed');
-            const empty = document.getElementById('feed-empty');
-            if (empty) empty.remove();
-
-            const details = data.details || {};
-            const product = details.product || details.text || 'Unknown item';
-            const channel = details.channel || '';
-            const amazonUrls = details.amazon_urls || [];
-            const productUrl = amazonUrls.length > 0 ? amazonUrls[0] : '';
-            const messageId = details.message_id || '';
-
-            // Debug logging
-            console.log('Feed item data:', {
-                step: data.step,
-                product: product,
-                amazonUrls: amazonUrls,
-                productUrl: productUrl,
-                messageId: messageId,
-                fullDetails: details
-            });
-
-            // Check for duplicate (same product AND same channel as first item)
-            const firstItem = feed.querySelector('.feed-item');
-            if (firstItem && firstItem.dataset.product) {
-                const firstProduct = firstItem.dataset.product;
-                const firstChannel = firstItem.dataset.channel || '';
-                if (product.substring(0, 100) === firstProduct && channel === firstChannel) {
-                    return; // Skip duplicate
-                }
-            }
-
-            // Check for NO MATCH first to avoid false positives (e.g., "no_rule_matched" contains "rule_matched")
-            const isNoMatch = data.step && (data.step.includes('no_match') || data.step.includes('no_rule'));
-            const isTriggered = !isNoMatch && data.step && (data.step.includes('would_trigger') || data.step.includes('rule_matched'));
-
-            let itemClass = '';
-            let verdictClass = '';
-            let verdictText = '';
-
-            if (isTriggered) {
-                itemClass = 'triggered';
-                verdictClass = 'trigger';
-                // Show "MATCHED" for live mode, "WOULD TRIGGER" for dry run
-                verdictText = data.step && data.step.includes('rule_matched') ? 'MATCHED' : 'WOULD TRIGGER';
-            } else if (isNoMatch) {
-                itemClass = 'not-triggered';
-                verdictClass = 'no-trigger';
-                verdictText = 'NO MATCH';
-            }
-
-            const price = details.price !== undefined ? '$' + details.price.toFixed(2) : '';
-            const discount = details.discount !== undefined ? details.discount + '% off' : '';
-
-            const productText = escapeHtml(product.substring(0, 150)) + (product.length > 150 ? '...' : '');
-            const productDisplay = productUrl
-                ? `<a href="${escapeHtml(productUrl)}" target="_blank" rel="noopener noreferrer" style="color: inherit; text-decoration: none; cursor: pointer;">${productText}</a>`
-                : productText;
-
-            // Steps section for triggered items (starts empty, fills via SSE)
-            const stepsSection = isTriggered && messageId ? `
-                <button class="steps-toggle" onclick="toggleSteps(this)">0 steps ▼</button>
-                <div class="steps-container" data-message-id="${escapeHtml(messageId)}"></div>
-            ` : '';
-
-            // Create item object for helper functions
-            const itemData = {
-                triggered: isTriggered,
-                amazon_urls: amazonUrls,
-                price: details.price,
-                product: product,
-                message_id: messageId
-            };
-
-            const item = document.createElement('div');
-            item.className = 'feed-item ' + itemClass;
-            item.dataset.product = product.substring(0, 100); // Store for dedup
-            item.dataset.channel = channel; // Store for per-channel dedup
-            item.dataset.messageId = messageId; // Store for step updates
-            item.innerHTML = `
-                <div class="feed-item-header">
-                    <span class="feed-verdict ${verdictClass}">${verdictText}</span>
-                    ${renderTriggerButton(itemData)}
-                    <div class="feed-item-meta">
-                        ${channel ? `<span class="feed-channel">${escapeHtml(channel)}</span>` : ''}
-                        <span class="feed-item-time">${formatTime(data.ts)}</span>
-                    </div>
-                </div>
-                <div class="feed-item-product">${productDisplay}</div>
-                <div class="feed-item-details">
-                    ${price ? `<span class="feed-price">${price}</span>` : ''}
-                    ${discount ? `<span class="feed-discount">${discount}</span>` : ''}
-                </div>
-                ${stepsSection}
-            `;
-
-            feed.insertBefore(item, feed.firstChild);
-
-            // Limit feed items
-            while (feed.children.length > MAX_FEED_ITEMS) {
-                feed.removeChild(feed.lastChild);
-            }
-        }
-
-        function escapeHtml(text) {
-            const div = document.createElement('div');
-            div.textContent = text;
-            return div.innerHTML;
-        }
-
-        function clearFeed() {
-            const feed = document.getElementById('activity-feed');
-            feed.innerHTML = '<div class="empty-state" id="feed-empty">Waiting for activity...</div>';
-        }
-
-        function connectSSE() {
-            if (eventSource) {
-                eventSource.close();
-            }
-
-            console.log('Attempting to connect to SSE:', EVENTS_URL);
-
-            try {
-                eventSource = new EventSource(EVENTS_URL);
-                console.log('EventSource created successfully');
-            } catch (error) {
-                console.error('Failed to create EventSource:', error);
-                setConnectionStatus(false);
-                setTimeout(connectSSE, 5000);
-                return;
-            }
-
-            eventSource.onopen = () => {
-                console.log('SSE connection opened');
-                setConnectionStatus(true);
-            };
-
-            eventSource.onerror = (error) => {
-                console.error('SSE connection error:', error, 'ReadyState:', eventSource.readyState);
-                setConnectionStatus(false);
-                // Reconnect after 5 seconds
-                setTimeout(connectSSE, 5000);
-            };
-
-            eventSource.onmessage = (event) => {
-                try {
-                    const data = JSON.parse(event.data);
-                    // Only show product-related events
-                    if (data.step && (
-                        data.step.includes('dry_run') ||
-                        data.step.includes('rule_matched') ||
-                        data.step.includes('no_rule') ||
-                        data.step === 'discord_message'
-                    )) {
-                        // Skip raw discord_message if we'll get a dry_run event
-                        if (data.step === 'discord_message') return;
-                        addFeedItem(data);
-                    }
-                } catch (e) {
-                    console.error('Failed to parse event:', e);
-                }
-            };
-
-            // Handle specific event types
-            eventSource.addEventListener('step', (event) => {
-                try {
-                    const data = JSON.parse(event.data);
-                    // Check for rule-related events (dry_run, matched, or no match)
-                    if (data.step && (
-                        data.step.includes('dry_run') ||
-                        data.step.includes('no_rule') ||
-                        data.step === 'rule_matched'  // Exact match to avoid matching "no_rule_matched"
-                    )) {
-                        addFeedItem(data);
-                    }
-
-                    // Real-time step updates for flow progress
-                    const messageId = data.details?.message_id;
-                    if (messageId && data.details?.message) {
-                        const container = document.querySelector(`.steps-container[data-message-id="${messageId}"]`);
-                        if (container) {
-                            // Append new step
-                            const stepHtml = `
-                                <div class="step-entry">
-                                    <span class="step-time">${formatTime(data.ts || new Date().toISOString())}</span>
-                                    <span class="step-name">${escapeHtml(data.step || '')}</span>
-                                    <span class="step-message">${escapeHtml(data.details?.message || '')}</span>
-                                </div>
-                            `;
-                            container.insertAdjacentHTML('beforeend', stepHtml);
-                            // Update toggle button count
-                            const toggle = container.previousElementSibling;
-                            if (toggle && toggle.classList.contains('steps-toggle')) {
-                                const count = container.children.length;
-                                const expanded = container.classList.contains('expanded');
-                                toggle.textContent = `${count} steps ${expanded ? '▲' : '▼'}`;
-                            }
-                            // Auto-scroll to bottom if expanded
-                            if (container.classList.contains('expanded')) {
-                                container.scrollTop = container.scrollHeight;
-                            }
-                        }
-                    }
-
-                    // Update result badge when flow completes
-                    if (data.step === 'amazon_flow_complete' && data.details?.message_id) {
-                        const feedItem = document.querySelector(`[data-message-id="${data.details.message_id}"]`)?.closest('.feed-item');
-                        if (feedItem) {
-                            const status = data.details.success ? 'success' : 'failure';
-                            // Add or update result badge
-                            let badge = feedItem.querySelector('.result-badge');
-                            if (!badge) {
-                                const verdict = feedItem.querySelector('.feed-verdict');
-                                if (verdict) {
-                                    verdict.insertAdjacentHTML('afterend', `<span class="result-badge ${status}">${status.toUpperCase()}</span>`);
-                                }
-                            } else {
-                                badge.className = `result-badge ${status}`;
-                                badge.textContent = status.toUpperCase();
-                            }
-                            // Add failure reason if failed
-                            if (!data.details.success && data.details.message) {
-                                let failureDiv = feedItem.querySelector('.failure-reason');
-                                if (!failureDiv) {
-                                    const details = feedItem.querySelector('.feed-item-details');
-                                    if (details) {
-                                        details.insertAdjacentHTML('afterend', `<div class="failure-reason">${escapeHtml(data.details.message)}</div>`);
-                                    }
-                                }
-                            }
-                        }
-                    }
-                } catch (e) {
-                    console.error('Error handling step event:', e);
-                }
-            });
-        }
-
-        // Load activity history from storage
-        async function loadActivityHistory() {
-            try {
-                const response = await fetch(API_BASE + '/api/activity');
-                const items = await response.json();
-                // Sort by timestamp descending (newest first) and add to feed
-                items.sort((a, b) => new Date(b.ts) - new Date(a.ts));
-                items.forEach(item => {
-                    addHistoryItem(item);
-                });
-            } catch (error) {
-                console.error('Failed to load activity history:', error);
-            }
-        }
-
-        async function triggerFlow(messageId, url, price, product) {
-            const button = event.target;
-            button.disabled = true;
-            button.textContent = 'Triggering...';
-
-            // Generate a unique message ID for tracking this flow
-            const triggerMessageId = 'manual-trigger-' + Date.now();
-
-            try {
-                const response = await fetch('/actions/trigger', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        url: url,
-                        price: price,
-                        message_id: triggerMessageId,
-                        product: product
-                    })
-                });
-
-                if (response.ok) {
-                    button.textContent = 'Triggered ✓';
-
-                    // Create a new feed item for this triggered flow
-                    addTriggeredFlowItem({
-                        messageId: triggerMessageId,
-                        url: url,
-                        price: price,
-                        product: product
-                    });
-
-                    setTimeout(() => {
-                        button.textContent = 'Trigger Flow';
-                        button.disabled = false;
-                    }, 3000);
-                } else {
-                    button.textContent = 'Failed ✗';
-                    setTimeout(() => {
-                        button.textContent = 'Trigger Flow';
-                        button.disabled = false;
-                    }, 3000);
-                }
-            } catch (error) {
-                console.error('Trigger failed:', error);
-                button.textContent = 'Error';
-                setTimeout(() => {
-                    button.textContent = 'Trigger Flow';
-                    button.disabled = false;
-                }, 3000);
-            }
-        }
-
-        function addTriggeredFlowItem(data) {
-            const feed = document.getElementById('activity-feed');
-            const empty = document.getElementById('feed-empty');
-            if (empty) empty.remove();
-
-            const item = document.createElement('div');
-            item.className = 'feed-item triggered';
-            item.dataset.product = (data.product || '').substring(0, 100);
-            item.dataset.channel = 'manual';
-            item.dataset.messageId = data.messageId;
-
-            const productText = escapeHtml((data.product || 'Manual Trigger').substring(0, 150));
-            const productDisplay = data.url
-                ? `<a href="${escapeHtml(data.url)}" target="_blank" rel="noopener noreferrer" style="color: inherit; text-decoration: none; cursor: pointer;">${productText}</a>`
-                : productText;
-
-            item.innerHTML = `
-                <div class="feed-item-header">
-                    <span class="feed-verdict trigger">TRIGGERED</span>
-                    <span class="result-badge pending">PENDING</span>
-                    <div class="feed-item-meta">
-                        <span class="feed-channel">manual</span>
-                        <span class="feed-item-time">${formatTime(new Date().toISOString())}</span>
-                    </div>
-                </div>
-                <div class="feed-item-product">${productDisplay}</div>
-                <div class="feed-item-details">
-                    ${data.price ? `<span class="feed-price">$${data.price.toFixed(2)}</span>` : ''}
-                </div>
-                <button class="steps-toggle" onclick="toggleSteps(this)">0 steps ▼</button>
-                <div class="steps-container expanded" data-message-id="${escapeHtml(data.messageId)}"></div>
-            `;
-
-            // Insert at top of feed
-            feed.insertBefore(item, feed.firstChild);
-
-            // Limit feed items
-            while (feed.children.length > MAX_FEED_ITEMS) {
-                feed.removeChild(feed.lastChild);
-            }
-        }
-
-        function renderTriggerButton(item) {
-            // Show trigger button for all items with Amazon URLs
-            if (!item.amazon_urls || item.amazon_urls.length === 0) {
-                return '';
-            }
-            const url = item.amazon_urls[0];
-            const price = item.price || 0;
-            const product = (item.product || '').replace(/'/g, "\\'");
-            const messageId = (item.message_id || '').replace(/'/g, "\\'");
-            return `<button class="btn-trigger" onclick="triggerFlow('${messageId}', '${url}', ${price}, '${product}')">Trigger Flow</button>`;
-        }
-
-        function renderResultBadge(item) {
-            const status = item.result_status || 'pending';
-            if (status === 'pending' || !item.triggered) return '';
-            return `<span class="result-badge ${status}">${status.toUpperCase()}</span>`;
-        }
-
-        function renderFailureReason(item) {
-            if (item.result_status === 'failure' && item.result_message) {
-                return `<div class="failure-reason">${escapeHtml(item.result_message)}</div>`;
-            }
-            return '';
-        }
-
-        function renderStepsSection(item) {
-            const steps = item.steps || [];
-            const messageId = item.message_id || '';
-            if (!item.triggered) return '';
-
-            return `
-                <button class="steps-toggle" onclick="toggleSteps(this)">
-                    ${steps.length} steps ${steps.length > 0 ? '▼' : ''}
-                </button>
-                <div class="steps-container" data-message-id="${escapeHtml(messageId)}">
-                    ${steps.map(s => `
-                        <div class="step-entry">
-                            <span class="step-time">${formatTime(s.ts)}</span>
-                            <span class="step-name">${escapeHtml(s.step)}</span>
-                            <span class="step-message">${escapeHtml(s.message)}</span>
-                        </div>
-                    `).join('')}
-                </div>
-            `;
-        }
-
-        function toggleSteps(btn) {
-            const container = btn.nextElementSibling;
-            container.classList.toggle('expanded');
-            const count = container.children.length;
-            btn.textContent = container.classList.contains('expanded')
-                ? `${count} steps ▲`
-                : `${count} steps ▼`;
-        }
-
-        function addHistoryItem(item) {
-            const feed = document.getElementById('activity-feed');
-            const empty = document.getElementById('feed-empty');
-            if (empty) empty.remove();
-
-            const thisProduct = (item.product || '').substring(0, 100);
-            const thisChannel = item.channel || '';
-            const amazonUrls = item.amazon_urls || [];
-            const productUrl = amazonUrls.length > 0 ? amazonUrls[0] : '';
-            const messageId = item.message_id || '';
-
-            // Debug logging
-            console.log('History item data:', {
-                product: thisProduct,
-                amazonUrls: amazonUrls,
-                productUrl: productUrl,
-                fullItem: item
-            });
-
-            // Check for duplicate (same product AND same channel as first item)
-            const firstItem = feed.querySelector('.feed-item');
-            if (firstItem && firstItem.dataset.product) {
-                const firstChannel = firstItem.dataset.channel || '';
-                if (thisProduct === firstItem.dataset.product && thisChannel === firstChannel) {
-                    return; // Skip duplicate
-                }
-            }
-
-            const isTriggered = item.triggered;
-
-            let itemClass = isTriggered ? 'triggered' : 'not-triggered';
-            let verdictClass = isTriggered ? 'trigger' : 'no-trigger';
-            let verdictText = isTriggered ? 'MATCHED' : 'NO MATCH';
-
-            const price = item.price !== undefined ? '$' + item.price.toFixed(2) : '';
-            const discount = item.discount !== undefined && item.discount > 0 ? item.discount + '% off' : '';
-
-            const productText = escapeHtml((item.product || '').substring(0, 150)) + ((item.product || '').length > 150 ? '...' : '');
-            const productDisplay = productUrl
-                ? `<a href="${escapeHtml(productUrl)}" target="_blank" rel="noopener noreferrer" style="color: inherit; text-decoration: none; cursor: pointer;">${productText}</a>`
-                : productText;
-
-            const elem = document.createElement('div');
-            elem.className = 'feed-item ' + itemClass;
-            elem.style.animation = 'none'; // No animation for history items
-            elem.dataset.product = thisProduct; // Store for dedup
-            elem.dataset.channel = thisChannel; // Store for per-channel dedup
-            elem.dataset.messageId = messageId; // Store for step updates
-            elem.innerHTML = `
-                <div class="feed-item-header">
-                    <span class="feed-verdict ${verdictClass}">${verdictText}</span>
-                    ${renderTriggerButton(item)}
-                    ${renderResultBadge(item)}
-                    <div class="feed-item-meta">
-                        ${thisChannel ? `<span class="feed-channel">${escapeHtml(thisChannel)}</span>` : ''}
-                        <span class="feed-item-time">${formatTime(item.ts)}</span>
-                    </div>
-                </div>
-                <div class="feed-item-product">${productDisplay}</div>
-                <div class="feed-item-details">
-                    ${price ? `<span class="feed-price">${price}</span>` : ''}
-                    ${discount ? `<span class="feed-discount">${discount}</span>` : ''}
+    <!-- Feed item skeleton, cloned per item by app.js; unused slots are removed -->
+    <template id="feed-item-tmpl">
+        <div class="feed-item">
+            <div class="feed-item-header">
+                <span class="feed-verdict" data-slot="verdict"></span>
+                <button class="btn-trigger" data-slot="trigger"></button>
+                <span class="result-badge" data-slot="badge"></span>
+                <div class="feed-item-meta">
+                    <span class="feed-channel" data-slot="channel"></span>
+                    <span class="feed-item-time" data-slot="time"></span>
                 </div>
-                ${renderFailureReason(item)}
-                ${renderStepsSection(item)}
-            `;
+            </div>
+            <div class="feed-item-product" data-slot="product"><a data-slot="link" target="_blank" rel="noopener noreferrer" style="color: inherit; text-decoration: none; cursor: pointer;"></a></div>
+            <div class="feed-item-details" data-slot="details">
+                <span class="feed-price" data-slot="price"></span>
+                <span class="feed-discount" data-slot="discount"></span>
+            </div>
+            <div class="failure-reason" data-slot="failure"></div>
+            <button class="steps-toggle" data-slot="toggle"></button>
+            <div class="steps-container" data-slot="steps"></div>
+        </div>
+    </template>
 
-            // Add to end (items already sorted newest first)
-            feed.appendChild(elem);
-        }
+    <template id="step-entry-tmpl">
+        <div class="step-entry"><span class="step-time"></span><span class="step-name"></span><span class="step-message"></span></div>
+    </template>
 
-        // Initialize
-        loadRules();
-        loadActivityHistory();
-        connectSSE();
-    </script>
+    <script src="/static/sse-common.js?v=__ASSET_VERSION__" defer></script>
+    <script src="/static/app.js?v=__ASSET_VERSION__" defer></script>
 </body>
 </html>
 """
 
+# Styles and scripts live in static/ (app.css, app.js and the SSE scripts) so browsers can
+# cache them; the content hash in their URLs forces a refetch after changes.
+_ASSET_VERSION = hashlib.blake2b(
+    b"".join((static_dir / name).read_bytes() for name in ("app.css", "sse-common.js", "app.js", "sse-worker.js")),
+    digest_size=6
+).hexdigest()
+
+# The page is static for the lifetime of the process, so render and
+# compress it once at import instead of on every request.
+_HTML_BYTES = (
+    HTML_TEMPLATE
+    .replace("__ASSET_VERSION__", _ASSET_VERSION)
+    .encode("utf-8")
+)
+_HTML_GZIP = gzip.compress(_HTML_BYTES, compresslevel=9)
+_HTML_BR = brotli.compress(_HTML_BYTES, quality=11)
+_HTML_ETAG = f'W/"{hashlib.blake2b(_HTML_BYTES, digest_size=8).hexdigest()}"'
+
+
+def _accepted_encodings(header: str) -> set:
+    """Parse Accept-Encoding into the set of codings not refused with q=0."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip().lower()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match, which may list several ETags or be '*' (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
 
 @rules_app.get("/", response_class=HTMLResponse)
-async def rules_ui():
+async def rules_ui(request: Request):
     """Serve the rules management UI."""
-    return HTML_TEMPLATE.replace("__MAX_FEED_ITEMS__", str(MAX_FEED_ITEMS))
+    headers = {
+        "Vary": "Accept-Encoding",
+        "ETag": _HTML_ETAG,
+        "Cache-Control": "public, max-age=60",
+    }
+    if _etag_matches(request, _HTML_ETAG):
+        return Response(status_code=304, headers=headers)
 
+    accept_encoding = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    if "br" in accept_encoding:
+        headers["Content-Encoding"] = "br"
+        return Response(content=_HTML_BR, media_type="text/html", headers=headers)
+    if "gzip" in accept_encoding:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=_HTML_GZIP, media_type="text/html", headers=headers)
+    return Response(content=_HTML_BYTES, media_type="text/html", headers=headers)
 
-@rules_app.get("/api/rules")
-async def get_rules():
-    """Get all rules."""
-    rules = load_rules()
-    return [r.to_dict() for r in rules]
 
+def _conditional_json(
+    request: Request, etag: str, build: Callable[[], Any], extra_headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Return 304 when the client already holds this ETag, else the JSON from build()."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache", **(extra_headers or {})}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(content=build(), headers=headers)
 
-@rules_app.post("/api/rules")
-async def create_rule(rule: RuleCreate):
-    """Create a new rule."""
-    rules = load_rules()
-
-    # Parse keywords from comma-separated string
-    keywords = [k.strip() for k in rule.keywords.split(",") if k.strip()]
 
-    if not keywords:
-        raise HTTPException(status_code=400, detail="At least one keyword is required")
-
-    if rule.max_price <= 0:
-        raise HTTPException(status_code=400, detail="Max price must be greater than 0")
+@rules_app.get("/api/rules")
+async def get_rules(
+    request: Request,
+    rule_type: Optional[Literal["whitelist", "blacklist"]] = Query(None, alias="type"),
+):
+    """Get all rules, or only one type with ?type=whitelist|blacklist."""
+    cache = _refresh_rules_cache()
+    if rule_type is None:
+        return _conditional_json(request, cache["etag"], lambda: cache["dicts"])
+    index = 0 if rule_type == "whitelist" else 1
+    return _conditional_json(request, cache["etag"], lambda: cache["partition_dicts"][index])
 
-    if rule.rule_type not in ["whitelist", "blacklist"]:
-        raise HTTPException(status_code=400, detail="Invalid rule_type")
 
+@rules_app.post("/api/rules")
+async def create_rule(rule: RuleCreate):
+    """Create a new rule (input is validated by RuleCreate)."""
+    cache = _refresh_rules_cache()
     new_rule = Rule(
-        keywords=keywords,
+        keywords=rule.keywords,
         max_price=rule.max_price,
-        rule_type=rule.rule_type
+        rule_type=rule.rule_type,
+        id=cache["next_id"]
     )
-    rules.append(new_rule)
-    save_rules(rules)
+    cache["by_id"][new_rule.id] = new_rule
+    _index_rules(cache["by_id"], new_rule.id + 1)
+    _mark_rules_dirty()
 
     return {"status": "created", "rule": new_rule.to_dict()}
 
 
-@rules_app.delete("/api/rules/{index}")
-async def delete_rule(index: int):
-    """Delete a rule by index."""
-    rules = load_rules()
+@rules_app.delete("/api/rules/{rule_id}")
+async def delete_rule(rule_id: int):
+    """Delete a rule by id."""
+    cache = _refresh_rules_cache()
+    deleted = cache["by_id"].pop(rule_id, None)
 
-    if index < 0 or index >= len(rules):
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Rule not found")
 
-    deleted = rules.pop(index)
-    save_rules(rules)
+    _index_rules(cache["by_id"], cache["next_id"])
+    _mark_rules_dirty()
 
     return {"status": "deleted", "rule": deleted.to_dict()}
 
 
 @rules_app.get("/api/rules/whitelist")
-async def get_whitelist_rules_api():
+async def get_whitelist_rules_api(request: Request):
     """Get whitelist rules only."""
-    return [r.to_dict() for r in get_whitelist_rules()]
+    cache = _refresh_rules_cache()
+    return _conditional_json(request, cache["etag"], lambda: cache["partition_dicts"][0])
 
 
 @rules_app.get("/api/rules/blacklist")
-async def get_blacklist_rules_api():
+async def get_blacklist_rules_api(request: Request):
     """Get blacklist rules only."""
-    return [r.to_dict() for r in get_blacklist_rules()]
+    cache = _refresh_rules_cache()
+    return _conditional_json(request, cache["etag"], lambda: cache["partition_dicts"][1])
 
 
 @rules_app.get("/api/activity")
-async def get_activity():
-    """Get activity history."""
-    return load_activity()
+async def get_activity(request: Request):
+    """Get activity history.
+
+    Clients sending Accept: application/x-ndjson get it newest first, one JSON
+    object per line, so they can render items while the rest downloads.
+    The body is built in one piece: the history is already in memory, and
+    streaming a sync iterator would cost a threadpool hop per line.
+    """
+    version = get_activity_version()
+    # The body format depends on Accept, so caches must key on it
+    vary = {"Vary": "Accept"}
+    if "application/x-ndjson" not in request.headers.get("accept", ""):
+        return _conditional_json(request, f'W/"{_BOOT_TAG}-{version}"', load_activity, vary)
+
+    etag = f'W/"{_BOOT_TAG}-{version}-nd"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", **vary}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    items = load_activity()
+    return Response(
+        content=b"".join(orjson.dumps(item) + b"\n" for item in reversed(items)),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+
+@rules_app.get("/api/config")
+async def get_config():
+    """Get UI settings."""
+    return ORJSONResponse(
+        content={"max_feed_items": MAX_FEED_ITEMS},
+        headers={"Cache-Control": "max-age=30"},
+    )
+
+
+# Shared keep-alive client for proxying to the main app (same process, port 8000)
+_main_app_client = httpx.AsyncClient(
+    base_url="http://localhost:8000",
+    timeout=10,
+    limits=httpx.Limits(max_keepalive_connections=8),
+)
 
 
 @rules_app.post("/actions/trigger")
 async def trigger_flow_proxy(request: dict):
     """Proxy trigger requests to main app.
 
-    Uses asyncio.to_thread to avoid blocking the shared event loop
-    (both servers run in the same asyncio.gather).
+    The request is awaited on the shared event loop (both servers run in the
+    same asyncio.gather) over a reused keep-alive connection.
     """
-    import asyncio
-    import urllib.request
-    import urllib.error
-
-    def _sync_request():
-        data = json.dumps(request).encode('utf-8')
-        req = urllib.request.Request(
-            "http://localhost:8000/actions/trigger",
-            data=data,
-            headers={'Content-Type': 'application/json'}
-        )
-        with urllib.request.urlopen(req, timeout=10) as response:
-            return json.loads(response.read().decode('utf-8'))
-
     try:
-        result = await asyncio.to_thread(_sync_request)
-        return JSONResponse(content=result)
-    except urllib.error.HTTPError as e:
-        raise HTTPException(status_code=e.code, detail=f"Trigger failed: {e.reason}")
+        response = await _main_app_client.post("/actions/trigger", json=request)
+        if response.is_error:
+            raise HTTPException(status_code=response.status_code, detail=f"Trigger failed: {response.reason_phrase}")
+        return ORJSONResponse(content=response.json())
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Failed to trigger: {str(e)}")
 
@@ -1387,4 +645,4 @@ async def get_manifest():
             }
         ]
     }
-    return JSONResponse(content=manifest)
+    return ORJSONResponse(content=manifest)
@@ -0,0 +1,857 @@
+const API_BASE = '';
+const EVENTS_URL = '/events?batch=true';
+// Reuse app.js's ?v= content hash so the worker script is refetched with it
+const ASSET_QUERY = new URL(document.currentScript.src).search;
+let eventSource = null;
+// Default until /api/config answers
+let MAX_FEED_ITEMS = 50;
+
+async function loadConfig() {
+    try {
+        const cfg = await (await fetch(API_BASE + '/api/config')).json();
+        MAX_FEED_ITEMS = cfg.max_feed_items;
+    } catch (error) {
+        console.error('Failed to load config:', error);
+    }
+}
+
+// Rules Management
+let currentRuleType = 'blacklist';
+
+function showStatus(message, isError = false) {
+    const status = document.getElementById('status');
+    status.textContent = message;
+    status.className = 'status ' + (isError ? 'error' : 'success');
+    setTimeout(() => { status.style.display = 'none'; }, 3000);
+}
+
+function openAddModal(ruleType) {
+    currentRuleType = ruleType;
+    document.getElementById('modal-rule-type').value = ruleType;
+    document.getElementById('modal-keywords').value = '';
+    document.getElementById('modal-max-price').value = '';
+    document.getElementById('add-rule-modal').classList.add('active');
+}
+
+function closeAddModal() {
+    document.getElementById('add-rule-modal').classList.remove('active');
+}
+
+async function loadRules() {
+    try {
+        const [whitelistRules, blacklistRules] = await Promise.all(
+            ['whitelist', 'blacklist'].map(type =>
+                fetch(API_BASE + '/api/rules?type=' + type).then(r => r.json()))
+        );
+        renderRuleList('whitelist-rules-list', whitelistRules);
+        renderRuleList('blacklist-rules-list', blacklistRules);
+    } catch (error) {
+        showStatus('Failed to load rules: ' + error.message, true);
+    }
+}
+
+function renderRuleList(containerId, rules) {
+    const container = document.getElementById(containerId);
+    if (rules.length === 0) {
+        container.innerHTML = '<div class="empty-state" style="padding: 15px;">No rules configured.</div>';
+        return;
+    }
+
+    container.innerHTML = rules.map(rule => {
+        return `
+            <div class="rule-card" data-id="${rule.id}">
+                <div class="rule-content">
+                    <div class="rule-info">
+                        <div class="keywords-display">
+                            ${rule.keywords.map(k => `<span class="keyword-tag">${escapeHtml(k)}</span>`).join('')}
+                        </div>
+                        <div class="price-display">$${rule.max_price.toFixed(2)}</div>
+                    </div>
+                    <div class="rule-actions">
+                        <button class="btn-delete-x" title="Delete">&times;</button>
+                    </div>
+                </div>
+            </div>
+        `;
+    }).join('');
+}
+
+async function addRuleFromModal() {
+    const keywords = document.getElementById('modal-keywords').value.trim();
+    const maxPrice = parseFloat(document.getElementById('modal-max-price').value);
+    const ruleType = document.getElementById('modal-rule-type').value;
+
+    if (!keywords) { showStatus('Please enter keywords', true); return; }
+    if (isNaN(maxPrice) || maxPrice <= 0) { showStatus('Please enter valid price', true); return; }
+
+    try {
+        const response = await fetch(API_BASE + '/api/rules', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ keywords, max_price: maxPrice, rule_type: ruleType })
+        });
+        if (!response.ok) throw new Error('Failed');
+
+        closeAddModal();
+        showStatus('Rule added');
+        loadRules();
+    } catch (error) {
+        showStatus('Failed to add rule', true);
+    }
+}
+
+async function deleteRuleQuick(ruleId) {
+    try {
+        await fetch(API_BASE + '/api/rules/' + ruleId, { method: 'DELETE' });
+        showStatus('Rule deleted');
+        loadRules();
+    } catch (error) {
+        showStatus('Failed to delete', true);
+    }
+}
+
+// Close modal on background click; delete buttons are handled here too
+// so re-rendered rule lists need no per-button handlers
+document.addEventListener('click', (e) => {
+    if (e.target.id === 'add-rule-modal') {
+        closeAddModal();
+        return;
+    }
+    const deleteBtn = e.target.closest('.btn-delete-x');
+    if (deleteBtn) {
+        deleteRuleQuick(deleteBtn.closest('.rule-card').dataset.id);
+    }
+});
+
+// Activity Feed
+function setConnectionStatus(connected) {
+    const dot = document.getElementById('connection-dot');
+    const text = document.getElementById('connection-text');
+    if (connected) {
+        dot.className = 'status-dot connected';
+        text.textContent = 'Connected';
+    } else {
+        dot.className = 'status-dot disconnected';
+        text.textContent = 'Disconnected';
+    }
+}
+
+// One shared formatter; toLocaleTimeString() resolves the locale on every call
+const TIME_FMT = new Intl.DateTimeFormat(undefined, { hour: 'numeric', minute: '2-digit', second: '2-digit' });
+
+function formatTime(isoString) {
+    return TIME_FMT.format(new Date(isoString));
+}
+
+// Dedup key for a feed item (product prefix + channel)
+function feedKey(product, channel) {
+    return channel + '\x00' + product;
+}
+
+// Key of the newest feed item, kept here so dedup never has to query the DOM
+// (null when the feed is empty or the newest item has no product)
+let feedHeadKey = null;
+
+// messageId -> refs to every element a later step or result update touches:
+// { feedItem, container, toggle, verdict, details, badge, failure }
+// (missing slots are undefined; badge and failure are filled in when created)
+const messageIdIndex = new Map();
+
+// Items with steps are watched so steps arriving while they are scrolled out
+// of view skip the label and scroll updates until they come back
+const offscreenObserver = new IntersectionObserver((entries) => {
+    for (const entry of entries) {
+        const item = entry.target;
+        item.classList.toggle('offscreen', !entry.isIntersecting);
+        if (entry.isIntersecting && item.dataset.stepsStale) {
+            delete item.dataset.stepsStale;
+            const refs = messageIdIndex.get(item.dataset.messageId);
+            if (refs?.feedItem === item) refreshStepsView(refs);
+        }
+    }
+}, { root: document.getElementById('activity-feed'), rootMargin: '200px' });
+
+function refreshStepsView({ container, toggle }) {
+    const expanded = container.classList.contains('expanded');
+    toggle.textContent = `${container.children.length} steps ${expanded ? '▲' : '▼'}`;
+    if (expanded) {
+        container.scrollTop = container.scrollHeight;
+    }
+}
+
+function indexFeedItem(elem, isNewest) {
+    const messageId = elem.dataset.messageId;
+    if (!messageId) return;
+    // The topmost item wins, as the document-order lookup it replaces did;
+    // shadowed items never receive updates, so they need no refs
+    if (!isNewest && messageIdIndex.has(messageId)) return;
+    // Slot markers from the template survive cloning, so one query finds them all
+    const refs = { feedItem: elem };
+    for (const el of elem.querySelectorAll('[data-slot]')) {
+        refs[el.dataset.slot] = el;
+    }
+    refs.container = refs.steps;
+    messageIdIndex.set(messageId, refs);
+    if (refs.container) offscreenObserver.observe(elem);
+}
+
+function unindexFeedItem(elem) {
+    offscreenObserver.unobserve(elem);
+    const messageId = elem.dataset.messageId;
+    if (messageId && messageIdIndex.get(messageId)?.feedItem === elem) {
+        messageIdIndex.delete(messageId);
+    }
+}
+
+// Live feed items and step entries are buffered and written once per animation frame
+let pendingFeedItems = [];
+let pendingSteps = new Map();  // messageId -> { entries: [{ ts, step, message }, ...], dropped: count }
+// Steps queued per container per frame; older ones collapse into one summary line
+const MAX_PENDING_STEPS = 50;
+// Step entries kept in a container; the oldest are dropped beyond this
+const MAX_STEP_ENTRIES = 200;
+let flushScheduled = false;
+
+function scheduleFlush() {
+    if (!flushScheduled) {
+        flushScheduled = true;
+        requestAnimationFrame(flushFeed);
+    }
+}
+
+function flushFeed() {
+    flushScheduled = false;
+
+    if (pendingFeedItems.length > 0) {
+        const feed = document.getElementById('activity-feed');
+        const empty = document.getElementById('feed-empty');
+        if (empty) empty.remove();
+
+        // Buffered in arrival order; the newest goes on top
+        const frag = document.createDocumentFragment();
+        for (let i = pendingFeedItems.length - 1; i >= 0; i--) {
+            frag.appendChild(pendingFeedItems[i]);
+        }
+        pendingFeedItems = [];
+        feed.insertBefore(frag, feed.firstChild);
+
+        // Limit feed items, removing the overflow in one operation
+        if (feed.children.length > MAX_FEED_ITEMS) {
+            for (let i = MAX_FEED_ITEMS; i < feed.children.length; i++) {
+                unindexFeedItem(feed.children[i]);
+            }
+            const range = document.createRange();
+            range.setStartBefore(feed.children[MAX_FEED_ITEMS]);
+            range.setEndAfter(feed.lastChild);
+            range.deleteContents();
+        }
+    }
+
+    // Steps go in after the items, so steps for a just-added item find its container
+    if (pendingSteps.size > 0) {
+        const steps = pendingSteps;
+        pendingSteps = new Map();
+
+        // Phase 1: append all queued steps (writes only)
+        const touched = [];
+        for (const [messageId, queued] of steps) {
+            const refs = messageIdIndex.get(messageId);
+            const container = refs?.container;
+            if (!container) continue;
+            const frag = document.createDocumentFragment();
+            if (queued.dropped > 0) {
+                frag.appendChild(buildStepEntry(null, '…', `(${queued.dropped} earlier steps)`));
+            }
+            for (const s of queued.entries) {
+                frag.appendChild(buildStepEntry(s.ts, s.step, s.message));
+            }
+            container.appendChild(frag);
+            const extra = container.children.length - MAX_STEP_ENTRIES;
+            if (extra > 0) {
+                const range = document.createRange();
+                range.setStartBefore(container.firstElementChild);
+                range.setEndAfter(container.children[extra - 1]);
+                range.deleteContents();
+            }
+            touched.push(refs);
+        }
+
+        // Phase 2: read counts and geometry once, after every write;
+        // off-screen items are only flagged and refreshed when they scroll back
+        const updates = [];
+        for (const { feedItem, container, toggle } of touched) {
+            if (feedItem.classList.contains('offscreen')) {
+                feedItem.dataset.stepsStale = '1';
+                continue;
+            }
+            const expanded = container.classList.contains('expanded');
+            updates.push({
+                container,
+                toggle,
+                count: container.children.length,
+                expanded,
+                scrollHeight: expanded ? container.scrollHeight : 0
+            });
+        }
+
+        // Phase 3: update toggle counts and auto-scroll expanded containers
+        for (const { container, toggle, count, expanded, scrollHeight } of updates) {
+            if (toggle) {
+                toggle.textContent = `${count} steps ${expanded ? '▲' : '▼'}`;
+            }
+            if (expanded) {
+                container.scrollTop = scrollHeight;
+            }
+        }
+    }
+}
+
+function addFeedItem(data) {
+    const details = data.details || {};
+    const product = details.product || details.text || 'Unknown item';
+    const channel = details.channel || '';
+    const amazonUrls = details.amazon_urls || [];
+    const productUrl = amazonUrls.length > 0 ? amazonUrls[0] : '';
+    const messageId = details.message_id || '';
+
+    // Debug logging
+    console.log('Feed item data:', {
+        step: data.step,
+        product: product,
+        amazonUrls: amazonUrls,
+        productUrl: productUrl,
+        messageId: messageId,
+        fullDetails: details
+    });
+
+    // Check for duplicate (same product AND same channel as newest item)
+    const key = feedKey(product.substring(0, 100), channel);
+    if (key === feedHeadKey) {
+        return; // Skip duplicate
+    }
+    feedHeadKey = key;
+
+    // Check for NO MATCH first to avoid false positives (e.g., "no_rule_matched" contains "rule_matched")
+    const isNoMatch = data.step && (data.step.includes('no_match') || data.step.includes('no_rule'));
+    const isTriggered = !isNoMatch && data.step && (data.step.includes('would_trigger') || data.step.includes('rule_matched'));
+
+    let itemClass = '';
+    let verdictClass = '';
+    let verdictText = '';
+
+    if (isTriggered) {
+        itemClass = 'triggered';
+        verdictClass = 'trigger';
+        // Show "MATCHED" for live mode, "WOULD TRIGGER" for dry run
+        verdictText = data.step && data.step.includes('rule_matched') ? 'MATCHED' : 'WOULD TRIGGER';
+    } else if (isNoMatch) {
+        itemClass = 'not-triggered';
+        verdictClass = 'no-trigger';
+        verdictText = 'NO MATCH';
+    }
+
+    const price = details.price !== undefined ? '$' + details.price.toFixed(2) : '';
+    const discount = details.discount !== undefined ? details.discount + '% off' : '';
+
+    const item = buildFeedItem({
+        itemClass,
+        verdictClass,
+        verdictText,
+        trigger: triggerData(amazonUrls, details.price, product, messageId),
+        channel,
+        time: formatTime(data.ts),
+        productText: product.substring(0, 150) + (product.length > 150 ? '...' : ''),
+        productUrl,
+        price,
+        discount,
+        // Steps section for triggered items (starts empty, fills via SSE)
+        steps: isTriggered && messageId ? { expanded: false } : null
+    });
+    item.dataset.product = product.substring(0, 100); // Store for dedup
+    item.dataset.channel = channel; // Store for per-channel dedup
+    item.dataset.messageId = messageId; // Store for step updates
+
+    pendingFeedItems.push(item);
+    indexFeedItem(item, true);
+    // rAF is paused in background tabs, so keep the buffer bounded
+    if (pendingFeedItems.length > MAX_FEED_ITEMS) {
+        unindexFeedItem(pendingFeedItems.shift());
+    }
+    scheduleFlush();
+}
+
+// Single-pass escape; also covers quotes since results land in attributes
+const HTML_ESC = Object.freeze({ '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' });
+const HTML_RE = /[&<>"']/g;
+
+function escapeHtml(text) {
+    return String(text ?? '').replace(HTML_RE, c => HTML_ESC[c]);
+}
+
+function clearFeed() {
+    pendingFeedItems = [];
+    pendingSteps.clear();
+    messageIdIndex.clear();
+    offscreenObserver.disconnect();
+    feedHeadKey = null;
+    const feed = document.getElementById('activity-feed');
+    feed.innerHTML = '<div class="empty-state" id="feed-empty">Waiting for activity...</div>';
+}
+
+// Backoff policy lives in sse-common.js, shared with the worker
+const reconnect = createReconnector(() => connectSSE());
+
+function scheduleReconnect() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+    reconnect.schedule();
+}
+
+function connectSSE() {
+    if (eventSource) {
+        eventSource.close();
+    }
+
+    console.log('Attempting to connect to SSE:', EVENTS_URL);
+
+    try {
+        eventSource = new EventSource(EVENTS_URL);
+        console.log('EventSource created successfully');
+    } catch (error) {
+        console.error('Failed to create EventSource:', error);
+        setConnectionStatus(false);
+        scheduleReconnect();
+        return;
+    }
+
+    eventSource.onopen = () => {
+        console.log('SSE connection opened');
+        setConnectionStatus(true);
+        reconnect.reset();
+    };
+
+    eventSource.onerror = (error) => {
+        console.error('SSE connection error:', error, 'ReadyState:', eventSource.readyState);
+        setConnectionStatus(false);
+        scheduleReconnect();
+    };
+
+    eventSource.onmessage = (event) => {
+        try {
+            handleMessageEvent(JSON.parse(event.data));
+        } catch (e) {
+            console.error('Failed to parse event:', e);
+        }
+    };
+
+    // Handle specific event types
+    eventSource.addEventListener('step', (event) => {
+        try {
+            handleStepEvent(JSON.parse(event.data));
+        } catch (e) {
+            console.error('Error handling step event:', e);
+        }
+    });
+
+    // Events coalesced by the server (/events?batch=true)
+    eventSource.addEventListener('batch', (event) => {
+        try {
+            handleEvents(JSON.parse(event.data));
+        } catch (e) {
+            console.error('Error handling event batch:', e);
+        }
+    });
+}
+
+function handleEvents(events) {
+    for (const data of events) {
+        if (data.type === 'message') handleMessageEvent(data);
+        else if (data.type === 'step') handleStepEvent(data);
+    }
+}
+
+// Prefer a worker that owns the SSE connection and parses events off the
+// main thread; fall back to connecting here when workers can't do it
+function startEvents() {
+    if (!window.Worker) {
+        connectSSE();
+        return;
+    }
+    let worker;
+    try {
+        worker = new Worker('/static/sse-worker.js' + ASSET_QUERY);
+    } catch (error) {
+        // e.g. SecurityError under a restrictive CSP or on an opaque origin
+        console.error('SSE worker unavailable:', error);
+        connectSSE();
+        return;
+    }
+    const fallBack = () => {
+        worker.terminate();
+        connectSSE();
+    };
+    worker.onmessage = (e) => {
+        const msg = e.data;
+        if (msg.kind === 'events') handleEvents(msg.events);
+        else if (msg.kind === 'status') setConnectionStatus(msg.connected);
+        else if (msg.kind === 'unsupported') fallBack();
+    };
+    worker.onerror = (error) => {
+        console.error('SSE worker failed:', error);
+        fallBack();
+    };
+    worker.postMessage({ type: 'connect', url: EVENTS_URL });
+}
+
+// isFeedStep() comes from sse-common.js
+function handleMessageEvent(data) {
+    // Only show product-related events
+    if (isFeedStep(data.step)) {
+        addFeedItem(data);
+    }
+}
+
+function handleStepEvent(data) {
+    // Check for rule-related events (dry_run, matched, or no match)
+    if (isFeedStep(data.step)) {
+        addFeedItem(data);
+    }
+
+    // Real-time step updates for flow progress, appended on the next frame
+    const messageId = data.details?.message_id;
+    if (messageId && data.details?.message) {
+        let queued = pendingSteps.get(messageId);
+        if (!queued) {
+            queued = { entries: [], dropped: 0 };
+            pendingSteps.set(messageId, queued);
+        }
+        queued.entries.push({
+            ts: data.ts || new Date().toISOString(),
+            step: data.step || '',
+            message: data.details.message
+        });
+        // Under a burst (or in a background tab) keep only the latest steps
+        if (queued.entries.length > MAX_PENDING_STEPS) {
+            queued.entries.shift();
+            queued.dropped++;
+        }
+        scheduleFlush();
+    }
+
+    // Update result badge when flow completes
+    if (data.step === 'amazon_flow_complete' && data.details?.message_id) {
+        // Buffered items are indexed too, so there is no need to flush first
+        const refs = messageIdIndex.get(data.details.message_id);
+        if (refs) {
+            const status = data.details.success ? 'success' : 'failure';
+            // Add or update result badge
+            if (!refs.badge && refs.verdict) {
+                refs.badge = document.createElement('span');
+                refs.verdict.after(refs.badge);
+            }
+            if (refs.badge) {
+                refs.badge.className = `result-badge ${status}`;
+                refs.badge.textContent = status.toUpperCase();
+            }
+            // Add failure reason if failed
+            if (!data.details.success && data.details.message && !refs.failure && refs.details) {
+                refs.failure = document.createElement('div');
+                refs.failure.className = 'failure-reason';
+                refs.failure.textContent = data.details.message;
+                refs.details.after(refs.failure);
+            }
+        }
+    }
+}
+
+// Items parsed per batch while streaming history; each batch is inserted on its own frame
+const HISTORY_BATCH_SIZE = 50;
+
+// Load activity history from storage, streamed newest first as NDJSON
+async function loadActivityHistory() {
+    try {
+        const response = await fetch(API_BASE + '/api/activity', {
+            headers: { 'Accept': 'application/x-ndjson' }
+        });
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+
+        // Skip items duplicating the newest feed item (same product AND channel)
+        // History is appended below, so it only becomes the head of an empty feed
+        const feed = document.getElementById('activity-feed');
+        const isFeedEmpty = () => pendingFeedItems.length === 0 && !feed.firstElementChild?.classList.contains('feed-item');
+        let feedEmpty = isFeedEmpty();
+
+        const appendBatch = async (items) => {
+            if (items.length === 0) return;
+            await new Promise(requestAnimationFrame);
+            // Live items may have arrived while this batch was downloading
+            if (feedEmpty) {
+                feedEmpty = isFeedEmpty();
+            }
+            const frag = document.createDocumentFragment();
+            for (const item of items) {
+                const product = (item.product || '').substring(0, 100);
+                const key = feedKey(product, item.channel || '');
+                if (key === feedHeadKey) continue;
+                const elem = buildHistoryItem(item);
+                frag.appendChild(elem);
+                indexFeedItem(elem, false);
+                if (feedEmpty) {
+                    feedEmpty = false;
+                    if (product) feedHeadKey = key;
+                }
+            }
+            // Add to end in one insertion (items arrive newest first)
+            if (frag.firstChild) {
+                const empty = document.getElementById('feed-empty');
+                if (empty) empty.remove();
+                feed.appendChild(frag);
+            }
+        };
+
+        let buffered = '';
+        let batch = [];
+        for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            const lines = (buffered + value).split('\n');
+            buffered = lines.pop();  // Keep a partial last line for the next chunk
+            for (const line of lines) {
+                if (line) batch.push(JSON.parse(line));
+            }
+            if (batch.length >= HISTORY_BATCH_SIZE) {
+                await appendBatch(batch);
+                batch = [];
+            }
+        }
+        if (buffered) batch.push(JSON.parse(buffered));
+        await appendBatch(batch);
+    } catch (error) {
+        console.error('Failed to load activity history:', error);
+    }
+}
+
+async function triggerFlow(button, messageId, url, price, product) {
+    button.disabled = true;
+    button.dataset.state = 'triggering';
+
+    // Generate a unique message ID for tracking this flow
+    const triggerMessageId = 'manual-trigger-' + Date.now();
+
+    try {
+        const response = await fetch('/actions/trigger', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                url: url,
+                price: price,
+                message_id: triggerMessageId,
+                product: product
+            })
+        });
+
+        if (response.ok) {
+            button.dataset.state = 'ok';
+
+            // Create a new feed item for this triggered flow
+            addTriggeredFlowItem({
+                messageId: triggerMessageId,
+                url: url,
+                price: price,
+                product: product
+            });
+        } else {
+            button.dataset.state = 'failed';
+        }
+    } catch (error) {
+        console.error('Trigger failed:', error);
+        button.dataset.state = 'error';
+    }
+
+    // One reset for every outcome; the label comes from CSS
+    setTimeout(() => {
+        delete button.dataset.state;
+        button.disabled = false;
+    }, 3000);
+}
+
+function addTriggeredFlowItem(data) {
+    const item = buildFeedItem({
+        itemClass: 'triggered',
+        verdictClass: 'trigger',
+        verdictText: 'TRIGGERED',
+        badge: 'pending',
+        channel: 'manual',
+        time: formatTime(new Date().toISOString()),
+        productText: (data.product || 'Manual Trigger').substring(0, 150),
+        productUrl: data.url,
+        price: data.price ? '$' + data.price.toFixed(2) : '',
+        steps: { expanded: true }
+    });
+    item.dataset.product = (data.product || '').substring(0, 100);
+    item.dataset.channel = 'manual';
+    item.dataset.messageId = data.messageId;
+    feedHeadKey = item.dataset.product ? feedKey(item.dataset.product, 'manual') : null;
+
+    // Insert at top of feed on the next frame
+    pendingFeedItems.push(item);
+    indexFeedItem(item, true);
+    scheduleFlush();
+}
+
+// Feed items are cloned from the <template> in the page and filled through
+// textContent and dataset, so their text needs no HTML escaping
+const FEED_ITEM_TMPL = document.getElementById('feed-item-tmpl').content.firstElementChild;
+
+// Trigger button data for items with Amazon URLs, else null (no button)
+function triggerData(amazonUrls, price, product, messageId) {
+    if (!amazonUrls || amazonUrls.length === 0) return null;
+    return { url: amazonUrls[0], price: Number(price) || 0, product: product || '', messageId: messageId || '' };
+}
+
+function buildFeedItem(f) {
+    const node = FEED_ITEM_TMPL.cloneNode(true);
+    const slot = {};
+    for (const el of node.querySelectorAll('[data-slot]')) {
+        slot[el.dataset.slot] = el;
+    }
+
+    if (f.itemClass) node.classList.add(f.itemClass);
+    if (f.verdictClass) slot.verdict.classList.add(f.verdictClass);
+    slot.verdict.textContent = f.verdictText;
+
+    // Clicks are handled by the delegated listener on the feed
+    if (f.trigger) Object.assign(slot.trigger.dataset, f.trigger);
+    else slot.trigger.remove();
+
+    if (f.badge) {
+        slot.badge.classList.add(f.badge);
+        slot.badge.textContent = f.badge.toUpperCase();
+    } else {
+        slot.badge.remove();
+    }
+
+    if (f.channel) slot.channel.textContent = f.channel;
+    else slot.channel.remove();
+    slot.time.textContent = f.time;
+
+    if (f.productUrl) {
+        slot.link.href = f.productUrl;
+        slot.link.textContent = f.productText;
+    } else {
+        slot.product.textContent = f.productText;
+    }
+
+    if (f.price) slot.price.textContent = f.price;
+    else slot.price.remove();
+    if (f.discount) slot.discount.textContent = f.discount;
+    else slot.discount.remove();
+    if (f.failure) slot.failure.textContent = f.failure;
+    else slot.failure.remove();
+
+    if (f.steps) {
+        const entries = f.steps.entries || [];
+        for (const s of entries) {
+            slot.steps.appendChild(buildStepEntry(s.ts, s.step, s.message));
+        }
+        if (f.steps.expanded) slot.steps.classList.add('expanded');
+        slot.toggle.textContent = `${entries.length} steps ${f.steps.expanded ? '▲' : '▼'}`;
+    } else {
+        slot.toggle.remove();
+        slot.steps.remove();
+    }
+    return node;
+}
+
+const STEP_ENTRY_TMPL = document.getElementById('step-entry-tmpl').content.firstElementChild;
+
+// One step line; ts may be null for synthetic entries with no time
+function buildStepEntry(ts, step, message) {
+    const node = STEP_ENTRY_TMPL.cloneNode(true);
+    const [time, name, text] = node.children;
+    if (ts) time.textContent = formatTime(ts);
+    name.textContent = step;
+    text.textContent = message;
+    return node;
+}
+
+function toggleSteps(btn) {
+    const container = btn.nextElementSibling;
+    container.classList.toggle('expanded');
+    const count = container.children.length;
+    btn.textContent = container.classList.contains('expanded')
+        ? `${count} steps ▲`
+        : `${count} steps ▼`;
+}
+
+function buildHistoryItem(item) {
+    const thisProduct = (item.product || '').substring(0, 100);
+    const thisChannel = item.channel || '';
+    const amazonUrls = item.amazon_urls || [];
+    const productUrl = amazonUrls.length > 0 ? amazonUrls[0] : '';
+    const messageId = item.message_id || '';
+
+    // Debug logging
+    console.log('History item data:', {
+        product: thisProduct,
+        amazonUrls: amazonUrls,
+        productUrl: productUrl,
+        fullItem: item
+    });
+
+    const isTriggered = item.triggered;
+
+    let itemClass = isTriggered ? 'triggered' : 'not-triggered';
+    let verdictClass = isTriggered ? 'trigger' : 'no-trigger';
+    let verdictText = isTriggered ? 'MATCHED' : 'NO MATCH';
+
+    const price = item.price !== undefined ? '$' + item.price.toFixed(2) : '';
+    const discount = item.discount !== undefined && item.discount > 0 ? item.discount + '% off' : '';
+
+    const fullProduct = item.product || '';
+    const status = item.result_status || 'pending';
+    const steps = item.steps || [];
+
+    const elem = buildFeedItem({
+        itemClass,
+        verdictClass,
+        verdictText,
+        trigger: triggerData(amazonUrls, item.price, item.product, messageId),
+        badge: isTriggered && status !== 'pending' ? status : '',
+        channel: thisChannel,
+        time: formatTime(item.ts),
+        productText: fullProduct.substring(0, 150) + (fullProduct.length > 150 ? '...' : ''),
+        productUrl,
+        price,
+        discount,
+        failure: status === 'failure' ? item.result_message : '',
+        steps: isTriggered ? { expanded: false, entries: steps } : null
+    });
+    elem.style.animation = 'none'; // No animation for history items
+    elem.dataset.product = thisProduct; // Store for dedup
+    elem.dataset.channel = thisChannel; // Store for per-channel dedup
+    elem.dataset.messageId = messageId; // Store for step updates
+    return elem;
+}
+
+// One listener for every feed item's buttons, including items added later
+document.getElementById('activity-feed').addEventListener('click', (e) => {
+    const toggle = e.target.closest('.steps-toggle');
+    if (toggle) {
+        toggleSteps(toggle);
+        return;
+    }
+    const trigger = e.target.closest('.btn-trigger');
+    if (trigger && !trigger.disabled) {
+        const d = trigger.dataset;
+        triggerFlow(trigger, d.messageId, d.url, Number(d.price), d.product);
+    }
+});
+
+// Initialize
+loadConfig();
+loadRules();
+loadActivityHistory();
+startEvents();
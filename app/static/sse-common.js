@@ -0,0 +1,35 @@
+// Shared by app.js (loaded before it) and sse-worker.js (via importScripts),
+// so the feed filter and the reconnect policy have a single definition.
+
+// Rule-related steps shown in the feed (dry_run, matched, or no match).
+// Raw discord_message steps are skipped since a dry_run or rule step follows.
+const FEED_STEPS = new Set(['rule_matched']);
+const FEED_STEP_PREFIXES = ['dry_run', 'no_rule'];
+
+function isFeedStep(step) {
+    return !!step && (FEED_STEPS.has(step) || FEED_STEP_PREFIXES.some(p => step.startsWith(p)));
+}
+
+// Reconnects back off exponentially (1s up to 30s, plus jitter); only one is ever pending
+const RECONNECT_BASE_MS = 1000;
+const RECONNECT_MAX_MS = 30000;
+
+// Returns { schedule, reset } driving connect(); reset() after a successful open
+function createReconnector(connect) {
+    let timer = null;
+    let delay = RECONNECT_BASE_MS;
+    return {
+        schedule() {
+            if (timer) return;
+            const wait = Math.min(RECONNECT_MAX_MS, delay) + Math.random() * 500;
+            timer = setTimeout(() => {
+                timer = null;
+                connect();
+            }, wait);
+            delay *= 2;
+        },
+        reset() {
+            delay = RECONNECT_BASE_MS;
+        }
+    };
+}
@@ -0,0 +1,67 @@
+// Owns the rules UI's SSE connection so event parsing and filtering stay off
+// the main thread. Posts one message per SSE frame:
+//   { kind: 'events', events: [...] }  parsed events the page acts on
+//   { kind: 'status', connected }      connection state changes
+//   { kind: 'unsupported' }            no EventSource here; the page connects itself
+
+// isFeedStep() and the reconnect backoff, shared with app.js; the worker's
+// own ?v= query keeps the import on the same asset version
+importScripts('/static/sse-common.js' + self.location.search);
+
+let eventsUrl = null;
+let eventSource = null;
+const reconnect = createReconnector(() => connect());
+
+// Feed steps of either type, plus step events carrying flow progress for an item
+function isRelevant(data) {
+    if (isFeedStep(data.step)) return data.type === 'message' || data.type === 'step';
+    return data.type === 'step' && !!data.details?.message_id;
+}
+
+function relay(parse) {
+    return (event) => {
+        try {
+            const events = parse(event.data).filter(isRelevant);
+            if (events.length > 0) postMessage({ kind: 'events', events });
+        } catch (e) {
+            console.error('Failed to parse event:', e);
+        }
+    };
+}
+
+function scheduleReconnect() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+    reconnect.schedule();
+}
+
+function connect() {
+    eventSource = new EventSource(eventsUrl);
+
+    eventSource.onopen = () => {
+        reconnect.reset();
+        postMessage({ kind: 'status', connected: true });
+    };
+
+    eventSource.onerror = () => {
+        postMessage({ kind: 'status', connected: false });
+        scheduleReconnect();
+    };
+
+    const single = (text) => [JSON.parse(text)];
+    eventSource.onmessage = relay(single);
+    eventSource.addEventListener('step', relay(single));
+    eventSource.addEventListener('batch', relay(JSON.parse));
+}
+
+self.onmessage = (e) => {
+    if (e.data.type !== 'connect' || eventSource) return;
+    if (typeof EventSource === 'undefined') {
+        postMessage({ kind: 'unsupported' });
+        return;
+    }
+    eventsUrl = e.data.url;
+    connect();
+};